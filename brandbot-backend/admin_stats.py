@@ -0,0 +1,137 @@
+import itertools
+import os
+import threading
+from collections import Counter, deque
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+# Number of recent events kept for the activity feed
+ACTIVITY_LIMIT = int(os.getenv("BRANDBOT_ACTIVITY_LIMIT", "100"))
+# Days of per-client generation counts kept
+GENERATION_DAYS = int(os.getenv("BRANDBOT_GENERATION_DAYS", "30"))
+
+_lock = threading.Lock()
+_plan_counts = Counter()
+_status_counts = Counter()
+_total_clients = 0
+_generations_total = 0
+# day -> Counter(client key -> generations); client key is the client id, or
+# "business:<id>" for legacy business DNA requests
+_generations_by_day = {}
+# day -> total generations, so totals don't need summing per read
+_generation_totals = {}
+# Completion parsing outcomes (structured, structured_truncated,
+# structured_fallback, legacy, legacy_missing_markers)
+_parse_outcomes = Counter()
+_activity = deque(maxlen=ACTIVITY_LIMIT)
+_activity_ids = itertools.count(1)
+
+
+def reset_client_counts(clients: Iterable[dict]):
+    """Recount clients by plan and status (one pass, at startup)"""
+    global _total_clients
+    with _lock:
+        _plan_counts.clear()
+        _status_counts.clear()
+        _total_clients = 0
+        for client in clients:
+            _count(client, 1)
+
+
+def _count(client: dict, delta: int):
+    global _total_clients
+    _total_clients += delta
+    _plan_counts[client.get("plan_type")] += delta
+    _status_counts[client.get("status", "active")] += delta
+    # Drop keys that reached zero so the breakdowns only list live values
+    for counts in (_plan_counts, _status_counts):
+        for key in [key for key, value in counts.items() if value == 0]:
+            del counts[key]
+
+
+def client_changed(before: Optional[dict], after: Optional[dict]):
+    """Adjust counts for a client created (before=None), updated or deleted (after=None)"""
+    with _lock:
+        if before is not None:
+            _count(before, -1)
+        if after is not None:
+            _count(after, 1)
+
+
+def record_activity(activity_type: str, message: str, client_id: Optional[int] = None,
+                    user: str = "Admin"):
+    with _lock:
+        _activity.appendleft({
+            "id": next(_activity_ids),
+            "type": activity_type,
+            "message": message,
+            "client_id": client_id,
+            "user": user,
+            "timestamp": datetime.now().isoformat()
+        })
+
+
+def record_generation(client_key):
+    global _generations_total
+    today = date.today()
+    with _lock:
+        _generations_total += 1
+        if today not in _generations_by_day:
+            _generations_by_day[today] = Counter()
+            _generation_totals[today] = 0
+            cutoff = today - timedelta(days=GENERATION_DAYS)
+            for day in [day for day in _generations_by_day if day <= cutoff]:
+                del _generations_by_day[day]
+                del _generation_totals[day]
+        _generations_by_day[today][client_key] += 1
+        _generation_totals[today] += 1
+
+
+def record_parse_outcome(outcome: str):
+    with _lock:
+        _parse_outcomes[outcome] += 1
+
+
+def _parse_failure_rate() -> dict:
+    # Share of completions whose sections couldn't be recovered, per mode
+    structured = (_parse_outcomes["structured"] + _parse_outcomes["structured_truncated"]
+                  + _parse_outcomes["structured_fallback"])
+    legacy = _parse_outcomes["legacy"] + _parse_outcomes["legacy_missing_markers"]
+    return {
+        "structured": round(_parse_outcomes["structured_fallback"] / structured, 4) if structured else None,
+        "legacy": round(_parse_outcomes["legacy_missing_markers"] / legacy, 4) if legacy else None
+    }
+
+
+def get_stats() -> dict:
+    """Current counters; independent of the number of clients"""
+    with _lock:
+        return {
+            "total_clients": _total_clients,
+            "clients_by_plan": dict(_plan_counts),
+            "clients_by_status": dict(_status_counts),
+            "generations_total": _generations_total,
+            "generations_today": _generation_totals.get(date.today(), 0),
+            "generations_by_day": {
+                day.isoformat(): total for day, total in _generation_totals.items()
+            },
+            "completion_parsing": {
+                "outcomes": {key: value for key, value in _parse_outcomes.items() if value},
+                "failure_rate": _parse_failure_rate()
+            }
+        }
+
+
+def get_client_generations(client_key) -> dict:
+    """Generations per day for one client over the retained window"""
+    with _lock:
+        return {
+            day.isoformat(): counts[client_key]
+            for day, counts in _generations_by_day.items() if client_key in counts
+        }
+
+
+def get_activity(limit: int = 20) -> list:
+    """Most recent activity first"""
+    with _lock:
+        return list(itertools.islice(_activity, max(0, limit)))
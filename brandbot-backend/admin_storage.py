@@ -1,8 +1,11 @@
 import json
 import os
+import threading
+import time
 from datetime import datetime
 from typing import List, Dict, Optional
 from models import Client, ContentRulesGlobal, ContentRulesClient
+import admin_stats
 
 # Get the directory where this file is located
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -11,6 +14,60 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CLIENTS_FILE = os.path.join(BASE_DIR, "data", "clients.json")
 CONTENT_RULES_FILE = os.path.join(BASE_DIR, "data", "content_rules.json")
 
+# Append-only change log. clients.json and content_rules.json are snapshots;
+# every mutation since the last compaction lives in the journal.
+JOURNAL_FILE = os.path.join(BASE_DIR, "data", "journal.log")
+# Journal being folded into the snapshots by an in-progress compaction
+COMPACTING_FILE = JOURNAL_FILE + ".compacting"
+
+# fsync policy for the journal: "always" (every entry), "interval" (entries
+# are synced within JOURNAL_FSYNC_INTERVAL seconds, by the writer or the
+# background thread) or "never" (leave it to the OS)
+JOURNAL_FSYNC = os.getenv("BRANDBOT_JOURNAL_FSYNC", "interval").lower()
+if JOURNAL_FSYNC not in ("always", "interval", "never"):
+    raise ValueError(
+        f"BRANDBOT_JOURNAL_FSYNC must be always, interval or never, not {JOURNAL_FSYNC!r}")
+JOURNAL_FSYNC_INTERVAL = float(
+    os.getenv("BRANDBOT_JOURNAL_FSYNC_INTERVAL", "1.0"))
+# Seconds between background compactions
+COMPACT_INTERVAL = float(os.getenv("BRANDBOT_COMPACT_INTERVAL", "30"))
+
+# Compact encoder reused for every journal entry and snapshot
+_encoder = json.JSONEncoder(
+    separators=(",", ":"), ensure_ascii=False, default=str)
+
+_lock = threading.RLock()
+# Serializes compactions (background thread vs. shutdown)
+_compact_lock = threading.Lock()
+_loaded = False
+# client_id -> client dict. Entries are replaced, never mutated in place, so a
+# compaction can serialize a reference copy outside the lock.
+_clients: Dict[int, dict] = {}
+_content_rules: Dict = {}
+_journal = None
+_journal_entries = 0
+_last_fsync = 0.0
+# True while journal entries have been written but not fsynced
+_journal_dirty = False
+_compactor = None
+_compactor_stop = threading.Event()
+# Bumped on every client mutation; keys the serialized row cache below
+_clients_version = 0
+# (fields, status) -> JSON-ready rows, valid while _rows_version matches
+_rows_cache: Dict[tuple, List[dict]] = {}
+# Same keys -> the rows encoded as JSON bytes, cleared with _rows_cache
+_rows_json_cache: Dict[tuple, bytes] = {}
+_rows_version = -1
+
+# Journal ops that change _clients
+CLIENT_OPS = ("clients_replace", "client_create", "client_update", "client_delete")
+
+# Fields list endpoints can project to. Documents are served separately.
+CLIENT_ROW_FIELDS = [
+    name for name in (getattr(Client, "model_fields", None) or Client.__fields__)
+    if name != "instruction_document"
+]
+
 
 def ensure_data_directory():
     """Ensure the data directory exists"""
@@ -18,126 +75,449 @@ def ensure_data_directory():
     os.makedirs(data_dir, exist_ok=True)
 
 
-def load_clients(exclude_documents: bool = False) -> List[Client]:
-    """Load clients from JSON file
-    
-    Args:
-        exclude_documents: If True, exclude instruction_document field for faster loading
-    """
-    ensure_data_directory()
+def _default_content_rules() -> Dict:
+    return {
+        "global_rules": {
+            "enabled": True,
+            "default_tone": "Professional",
+            "default_audience": "B2B",
+            "mandatory_keywords": [],
+            "excluded_keywords": [],
+            "default_content_length": "medium"
+        },
+        "client_rules": {}
+    }
+
+
+def _read_snapshots():
+    """Load clients and content rules from the snapshot files"""
+    clients = {}
     try:
         if os.path.exists(CLIENTS_FILE):
             with open(CLIENTS_FILE, "r") as f:
-                data = json.load(f)
-                if exclude_documents:
-                    # Remove instruction_document to speed up loading for list views
-                    for client in data:
-                        if "instruction_document" in client:
-                            client.pop("instruction_document", None)
-                return [Client(**client) for client in data]
-        return []
+                for client in json.load(f):
+                    clients[client["id"]] = client
     except Exception as e:
         print(f"Error loading clients: {e}")
-        return []
 
+    rules = _default_content_rules()
+    try:
+        if os.path.exists(CONTENT_RULES_FILE):
+            with open(CONTENT_RULES_FILE, "r") as f:
+                rules = json.load(f)
+    except Exception as e:
+        print(f"Error loading content rules: {e}")
+
+    return clients, rules
 
-def save_clients(clients: List[Client]):
-    """Save clients to JSON file"""
-    ensure_data_directory()
+
+def _apply(entry: dict):
+    """Apply one journal entry to the in-memory state.
+
+    Entries have set semantics, so replaying a journal over a snapshot that
+    already contains some of its effects gives the same final state.
+    """
+    global _clients_version
+    op = entry["op"]
+    if op in CLIENT_OPS:
+        _clients_version += 1
+    if op == "clients_replace":
+        _clients.clear()
+        for client in entry["clients"]:
+            _clients[client["id"]] = client
+        admin_stats.reset_client_counts(_clients.values())
+    elif op == "client_create":
+        client = entry["client"]
+        admin_stats.client_changed(_clients.get(client["id"]), client)
+        _clients[client["id"]] = client
+    elif op == "client_update":
+        current = _clients.get(entry["id"])
+        if current is not None:
+            updated = {**current, **entry["fields"]}
+            admin_stats.client_changed(current, updated)
+            _clients[entry["id"]] = updated
+    elif op == "client_delete":
+        admin_stats.client_changed(_clients.pop(entry["id"], None), None)
+    elif op == "global_rules":
+        _content_rules["global_rules"] = {
+            **_content_rules["global_rules"], **entry["rules"]}
+    elif op == "client_rules":
+        _content_rules["client_rules"] = {
+            **_content_rules["client_rules"], str(entry["id"]): entry["rules"]}
+    elif op == "rules_replace":
+        _content_rules["global_rules"] = entry["rules"]["global_rules"]
+        _content_rules["client_rules"] = entry["rules"]["client_rules"]
+
+
+class JournalCorrupted(Exception):
+    """A journal entry other than an unterminated final one is unreadable"""
+
+
+def _replay(path: str) -> int:
+    """Replay a journal file, returning the number of entries applied.
+
+    Only an unterminated final line (a write torn by a crash) is dropped and
+    truncated away. Any other unreadable entry raises JournalCorrupted and
+    leaves the file untouched, since the entries after it were committed.
+    """
+    if not os.path.exists(path):
+        return 0
+    applied = 0
+    valid_bytes = 0
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            if not line.endswith(b"\n"):
+                # A torn final write from a crash; drop it so later appends
+                # start on a clean line
+                print(f"Discarding truncated journal entry at line {number} of {path}")
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                print(f"Error replaying journal: line {number} of {path} is corrupt: {e}")
+                raise JournalCorrupted(
+                    f"{path} line {number} is corrupt; restore or remove it to start") from e
+            _apply(entry)
+            applied += 1
+            valid_bytes += len(line)
+    if valid_bytes < os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return applied
+
+
+def _open_journal():
+    global _journal
+    _journal = open(JOURNAL_FILE, "a", encoding="utf-8")
+
+
+def _ensure_loaded():
+    """Recover state from the snapshots plus the journal tail, once"""
+    global _loaded, _clients, _content_rules, _journal_entries
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        ensure_data_directory()
+        _clients, _content_rules = _read_snapshots()
+        admin_stats.reset_client_counts(_clients.values())
+        _journal_entries = _replay(COMPACTING_FILE) + _replay(JOURNAL_FILE)
+        _open_journal()
+        _loaded = True
+
+
+def _sync_journal():
+    """fsync journal entries written since the last sync. Caller holds _lock."""
+    global _journal_dirty, _last_fsync
+    if _journal_dirty:
+        os.fsync(_journal.fileno())
+        _journal_dirty = False
+        _last_fsync = time.monotonic()
+
+
+def _append(entry: dict):
+    """Apply a mutation and append it to the journal. Caller holds _lock."""
+    global _journal_entries, _journal_dirty
     try:
-        with open(CLIENTS_FILE, "w") as f:
-            json.dump([client.dict()
-                      for client in clients], f, indent=2, default=str)
+        _journal.write(_encoder.encode(entry) + "\n")
+        _journal.flush()
+        _journal_dirty = JOURNAL_FSYNC != "never"
+        if JOURNAL_FSYNC == "always" or (
+                JOURNAL_FSYNC == "interval"
+                and time.monotonic() - _last_fsync >= JOURNAL_FSYNC_INTERVAL):
+            _sync_journal()
+        # Otherwise the tail of a burst is synced by the background thread
     except Exception as e:
-        print(f"Error saving clients: {e}")
+        print(f"Error writing journal: {e}")
         raise e
+    _apply(entry)
+    _journal_entries += 1
+
+
+def _write_snapshot(path: str, data):
+    """Atomically replace a snapshot file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for chunk in _encoder.iterencode(data):
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def compact() -> bool:
+    """Fold the journal into the snapshot files.
+
+    The live journal is rotated aside under the lock and the snapshots are
+    written outside it, so writers are only blocked for the rotation. The
+    rotated journal is removed once both snapshots are on disk; until then
+    startup recovery replays it. Returns True if a compaction ran.
+    """
+    _ensure_loaded()
+    with _compact_lock:
+        return _compact()
+
+
+def _compact() -> bool:
+    global _journal_entries
+    with _lock:
+        if _journal_entries == 0:
+            return False
+        clients = list(_clients.values())
+        rules = {
+            "global_rules": _content_rules["global_rules"],
+            "client_rules": _content_rules["client_rules"]
+        }
+        # The rotated journal is the only copy until the snapshots land
+        _sync_journal()
+        _journal.close()
+        if os.path.exists(COMPACTING_FILE):
+            # A previous compaction failed part way; keep its entries
+            with open(JOURNAL_FILE, "r", encoding="utf-8") as src, \
+                    open(COMPACTING_FILE, "a", encoding="utf-8") as dst:
+                dst.write(src.read())
+            os.remove(JOURNAL_FILE)
+        else:
+            os.replace(JOURNAL_FILE, COMPACTING_FILE)
+        _open_journal()
+        _journal_entries = 0
+
+    try:
+        _write_snapshot(CLIENTS_FILE, clients)
+        _write_snapshot(CONTENT_RULES_FILE, rules)
+        os.remove(COMPACTING_FILE)
+    except Exception as e:
+        print(f"Error compacting journal: {e}")
+        # The rotated journal is kept; make sure the next tick retries
+        with _lock:
+            _journal_entries += 1
+        raise e
+    return True
+
+
+def _periodic_sync():
+    with _lock:
+        try:
+            _sync_journal()
+        except Exception as e:
+            print(f"Error syncing journal: {e}")
+
+
+def _compactor_loop():
+    # In interval mode, also wake up often enough to bound unsynced entries
+    tick = COMPACT_INTERVAL
+    if JOURNAL_FSYNC == "interval":
+        tick = min(COMPACT_INTERVAL, JOURNAL_FSYNC_INTERVAL)
+    next_compaction = time.monotonic() + COMPACT_INTERVAL
+    while not _compactor_stop.wait(tick):
+        if JOURNAL_FSYNC == "interval":
+            _periodic_sync()
+        if time.monotonic() < next_compaction:
+            continue
+        next_compaction = time.monotonic() + COMPACT_INTERVAL
+        try:
+            compact()
+        except Exception:
+            # Already logged; the journal is intact so retry next tick
+            pass
+
+
+def init_storage():
+    """Recover persisted state and start the background compactor"""
+    global _compactor
+    _ensure_loaded()
+    if _compactor is None or not _compactor.is_alive():
+        _compactor_stop.clear()
+        _compactor = threading.Thread(
+            target=_compactor_loop, name="journal-compactor", daemon=True)
+        _compactor.start()
+
+
+def shutdown_storage():
+    """Stop the compactor and fold any outstanding journal entries"""
+    global _compactor
+    _compactor_stop.set()
+    if _compactor is not None:
+        _compactor.join()
+        _compactor = None
+    compact()
+
+
+def load_clients(exclude_documents: bool = False) -> List[Client]:
+    """Load clients from the in-memory store
+
+    Args:
+        exclude_documents: If True, exclude instruction_document field for faster loading
+    """
+    _ensure_loaded()
+    with _lock:
+        data = list(_clients.values())
+    if exclude_documents:
+        # Drop instruction_document to speed up model construction for list views
+        return [Client(**{k: v for k, v in client.items() if k != "instruction_document"})
+                for client in data]
+    return [Client(**client) for client in data]
+
+
+def save_clients(clients: List[Client]):
+    """Replace the whole client collection"""
+    _ensure_loaded()
+    with _lock:
+        _append({"op": "clients_replace",
+                 "clients": [client.dict() for client in clients]})
 
 
 def get_next_client_id() -> int:
     """Get the next available client ID"""
-    clients = load_clients()
-    if not clients:
-        return 1
-    return max(client.id for client in clients) + 1
+    _ensure_loaded()
+    with _lock:
+        if not _clients:
+            return 1
+        return max(_clients) + 1
 
 
 def create_client(client_data: dict) -> Client:
     """Create a new client"""
-    clients = load_clients()
-    new_client = Client(
-        id=get_next_client_id(),
-        date_joined=datetime.now(),
-        **client_data
-    )
-    clients.append(new_client)
-    save_clients(clients)
+    _ensure_loaded()
+    with _lock:
+        new_client = Client(
+            id=get_next_client_id(),
+            date_joined=datetime.now(),
+            **client_data
+        )
+        _append({"op": "client_create", "client": new_client.dict()})
     return new_client
 
 
 def update_client(client_id: int, update_data: dict) -> Optional[Client]:
     """Update an existing client"""
-    clients = load_clients()
-    for i, client in enumerate(clients):
-        if client.id == client_id:
-            # Update only provided fields
-            for key, value in update_data.items():
-                if value is not None:
-                    setattr(clients[i], key, value)
-            clients[i].last_activity = datetime.now()
-            save_clients(clients)
-            return clients[i]
-    return None
+    _ensure_loaded()
+    with _lock:
+        current = _clients.get(client_id)
+        if current is None:
+            return None
+        # Update only provided fields
+        fields = {key: value for key, value in update_data.items()
+                  if value is not None}
+        fields["last_activity"] = datetime.now()
+        updated = Client(**{**current, **fields})
+        # Journal only the changed fields, as validated by the model
+        updated_data = updated.dict()
+        _append({"op": "client_update", "id": client_id,
+                 "fields": {key: updated_data[key] for key in fields}})
+        return updated
 
 
 def delete_client(client_id: int) -> bool:
     """Delete a client"""
-    clients = load_clients()
-    original_count = len(clients)
-    clients = [client for client in clients if client.id != client_id]
-    if len(clients) < original_count:
-        save_clients(clients)
+    _ensure_loaded()
+    with _lock:
+        if client_id not in _clients:
+            return False
+        _append({"op": "client_delete", "id": client_id})
         return True
-    return False
 
 
 def get_client(client_id: int) -> Optional[Client]:
     """Get a specific client by ID"""
-    clients = load_clients()
-    for client in clients:
-        if client.id == client_id:
-            return client
-    return None
+    _ensure_loaded()
+    client = _clients.get(client_id)
+    if client is None:
+        return None
+    return Client(**client)
 
 
-def search_clients(
+def _to_row(client: dict) -> dict:
+    """Validate a stored client into a JSON-ready dict without its document"""
+    data = Client(**client).dict()
+    return {
+        name: value.isoformat() if isinstance(value, datetime) else value
+        for name, value in data.items() if name != "instruction_document"
+    }
+
+
+def client_rows(fields: Optional[List[str]] = None, status: Optional[str] = None) -> List[dict]:
+    """Serialized client rows for list views, cached per collection version
+
+    Args:
+        fields: Project each row to these fields ("id" is always kept)
+        status: Only include clients with exactly this status
+    """
+    global _rows_version
+    _ensure_loaded()
+    # Key order doesn't matter in JSON, so normalize to bound the cache
+    fields = sorted(set(fields)) if fields else None
+    key = (tuple(fields) if fields else None, status)
+    with _lock:
+        if _rows_version != _clients_version:
+            _rows_cache.clear()
+            _rows_json_cache.clear()
+            _rows_cache[(None, None)] = [_to_row(c) for c in _clients.values()]
+            _rows_version = _clients_version
+        rows = _rows_cache.get(key)
+        if rows is None:
+            rows = _rows_cache[(None, None)]
+            if status is not None:
+                rows = [row for row in rows if row["status"] == status]
+            if fields:
+                rows = [project_row(row, fields) for row in rows]
+            _rows_cache[key] = rows
+        return rows
+
+
+def client_rows_json(fields: Optional[List[str]] = None, status: Optional[str] = None) -> bytes:
+    """client_rows() encoded as a JSON array, cached per collection version"""
+    fields = sorted(set(fields)) if fields else None
+    key = (tuple(fields) if fields else None, status)
+    with _lock:
+        # Refreshes both caches after a client change
+        rows = client_rows(fields, status)
+        body = _rows_json_cache.get(key)
+        if body is None:
+            body = _rows_json_cache[key] = _encoder.encode(rows).encode("utf-8")
+        return body
+
+
+def project_row(row: dict, fields: List[str]) -> dict:
+    """Keep only the requested fields of a row, always including the id"""
+    projected = {"id": row["id"]}
+    for name in fields:
+        projected[name] = row[name]
+    return projected
+
+
+def search_client_rows(
     query: str = "",
     plan_filter: str = "",
     status_filter: str = "",
     page: int = 1,
-    page_size: int = 10
+    page_size: int = 10,
+    fields: Optional[List[str]] = None
 ) -> tuple:
-    """Search and filter clients with pagination. Returns (page_items, total_count).
-    
-    Optimized to exclude instruction_document for faster loading.
+    """Search and filter serialized client rows with pagination.
+
+    Returns (page_rows, total_count). Rows come from client_rows() so
+    filtering never re-validates or re-serializes unchanged clients.
     """
-    # Exclude documents for faster list loading - documents are loaded separately when needed
-    clients = load_clients(exclude_documents=True)
+    rows = client_rows()
 
     if query:
-        clients = [client for client in clients
-                   if query.lower() in (client.company_name or "").lower()
-                   or query.lower() in (client.contact_person or "").lower()
-                   or query.lower() in (client.email or "").lower()]
+        query = query.lower()
+        rows = [row for row in rows
+                if query in (row["company_name"] or "").lower()
+                or query in (row["contact_person"] or "").lower()
+                or query in (row["email"] or "").lower()]
 
     if plan_filter:
-        clients = [client for client in clients if (
-            client.plan_type or "").lower() == plan_filter.lower()]
+        rows = [row for row in rows if (
+            row["plan_type"] or "").lower() == plan_filter.lower()]
 
     if status_filter:
-        clients = [client for client in clients if (
-            client.status or "").lower() == status_filter.lower()]
+        rows = [row for row in rows if (
+            row["status"] or "").lower() == status_filter.lower()]
 
-    total = len(clients)
+    total = len(rows)
     # Ensure sane pagination values
     try:
         page = max(1, int(page))
@@ -150,70 +530,61 @@ def search_clients(
 
     start = (page - 1) * page_size
     end = start + page_size
-    page_items = clients[start:end]
+    page_rows = rows[start:end]
+    if fields:
+        page_rows = [project_row(row, fields) for row in page_rows]
+
+    return page_rows, total
+
+
+def search_clients(
+    query: str = "",
+    plan_filter: str = "",
+    status_filter: str = "",
+    page: int = 1,
+    page_size: int = 10
+) -> tuple:
+    """Search and filter clients with pagination. Returns (page_items, total_count).
 
-    return page_items, total
+    Optimized to exclude instruction_document for faster loading.
+    """
+    page_rows, total = search_client_rows(
+        query, plan_filter, status_filter, page, page_size)
+    return [Client(**row) for row in page_rows], total
 
 
 def load_content_rules() -> Dict:
-    """Load content rules from JSON file"""
-    ensure_data_directory()
-    try:
-        if os.path.exists(CONTENT_RULES_FILE):
-            with open(CONTENT_RULES_FILE, "r") as f:
-                return json.load(f)
+    """Load content rules from the in-memory store"""
+    _ensure_loaded()
+    with _lock:
         return {
-            "global_rules": {
-                "enabled": True,
-                "default_tone": "Professional",
-                "default_audience": "B2B",
-                "mandatory_keywords": [],
-                "excluded_keywords": [],
-                "default_content_length": "medium"
-            },
-            "client_rules": {}
-        }
-    except Exception as e:
-        print(f"Error loading content rules: {e}")
-        return {
-            "global_rules": {
-                "enabled": True,
-                "default_tone": "Professional",
-                "default_audience": "B2B",
-                "mandatory_keywords": [],
-                "excluded_keywords": [],
-                "default_content_length": "medium"
-            },
-            "client_rules": {}
+            "global_rules": dict(_content_rules["global_rules"]),
+            "client_rules": dict(_content_rules["client_rules"])
         }
 
 
 def save_content_rules(rules: Dict):
-    """Save content rules to JSON file"""
-    ensure_data_directory()
-    try:
-        with open(CONTENT_RULES_FILE, "w") as f:
-            json.dump(rules, f, indent=2)
-    except Exception as e:
-        print(f"Error saving content rules: {e}")
-        raise e
+    """Replace all content rules"""
+    _ensure_loaded()
+    with _lock:
+        _append({"op": "rules_replace", "rules": rules})
 
 
 def update_global_rules(global_rules: dict):
     """Update global content rules"""
-    rules = load_content_rules()
-    rules["global_rules"].update(global_rules)
-    save_content_rules(rules)
+    _ensure_loaded()
+    with _lock:
+        _append({"op": "global_rules", "rules": global_rules})
 
 
 def update_client_rules(client_id: int, client_rules: dict):
     """Update client-specific content rules"""
-    rules = load_content_rules()
-    rules["client_rules"][str(client_id)] = client_rules
-    save_content_rules(rules)
+    _ensure_loaded()
+    with _lock:
+        _append({"op": "client_rules", "id": client_id, "rules": client_rules})
 
 
 def get_client_rules(client_id: int) -> Optional[dict]:
     """Get client-specific content rules"""
-    rules = load_content_rules()
-    return rules["client_rules"].get(str(client_id))
+    _ensure_loaded()
+    return _content_rules["client_rules"].get(str(client_id))
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+# Upstream generations allowed to run at once
+MAX_IN_FLIGHT = int(os.getenv("BRANDBOT_MAX_IN_FLIGHT", "8"))
+# Requests allowed to wait for a slot; beyond this they are rejected at once
+MAX_QUEUE = int(os.getenv("BRANDBOT_MAX_QUEUE", "16"))
+# Seconds suggested to rejected clients via Retry-After
+RETRY_AFTER_SECONDS = int(os.getenv("BRANDBOT_RETRY_AFTER", "5"))
+# Server-side cap on a request's deadline, whatever the client asks for
+MAX_REQUEST_SECONDS = float(os.getenv("BRANDBOT_MAX_REQUEST_SECONDS", "120"))
+# How often to check whether the client is still connected
+DISCONNECT_POLL_SECONDS = 0.25
+
+# Client-supplied time budget for the whole request, in seconds
+DEADLINE_HEADER = "X-Request-Timeout"
+
+
+class Overloaded(Exception):
+    """No generation slot is free and the wait queue is full"""
+
+
+class DeadlineExceeded(Exception):
+    """The client-supplied deadline passed before the request finished"""
+
+
+class ClientDisconnected(Exception):
+    """The client went away while its request was in progress"""
+
+
+def request_deadline(headers) -> float:
+    """Absolute time.monotonic() deadline for a request"""
+    timeout = MAX_REQUEST_SECONDS
+    value = headers.get(DEADLINE_HEADER)
+    if value:
+        try:
+            timeout = min(max(float(value), 0.0), MAX_REQUEST_SECONDS)
+        except ValueError:
+            pass
+    return time.monotonic() + timeout
+
+
+class AdmissionController:
+    """Bounds concurrent upstream generations plus a bounded wait queue"""
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, max_queue: int = MAX_QUEUE):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        # Requests whose deadline passed while they were queued
+        self.expired = 0
+
+    @asynccontextmanager
+    async def admit(self, deadline: float):
+        """Hold a generation slot, waiting in the queue if none is free.
+
+        The wait has no timeout of its own: run_cancellable owns the deadline
+        and cancels the wait when it passes. deadline is only used to tell an
+        expiry from a disconnect.
+        """
+        if not self._semaphore.locked():
+            # A slot is free; acquire() returns without suspending
+            await self._semaphore.acquire()
+        else:
+            await self._wait_for_slot(deadline)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def _wait_for_slot(self, deadline: float):
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        except asyncio.CancelledError:
+            # Cancelled by run_cancellable: deadline reached or client gone
+            if time.monotonic() >= deadline:
+                self.expired += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue
+        }
+
+
+async def admitted(controller: AdmissionController, coro, deadline: float):
+    """Run coro once controller grants a slot"""
+    try:
+        async with controller.admit(deadline):
+            return await coro
+    finally:
+        # No-op once awaited; avoids "never awaited" warnings on rejection
+        coro.close()
+
+
+async def run_cancellable(request, coro, deadline: float):
+    """Await an upstream call, cancelling it if the client disconnects or the
+    deadline passes. Cancelling closes the upstream connection, so the slot
+    goes back to live requests straight away.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded()
+            done, _ = await asyncio.wait(
+                {task}, timeout=min(DISCONNECT_POLL_SECONDS, remaining))
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+            # Let the cancellation unwind (closing the upstream connection
+            # and settling the admission counters) before responding
+            await asyncio.wait({task})
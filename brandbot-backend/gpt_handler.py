@@ -1,7 +1,9 @@
 import openai
 import os
+import time
 from dotenv import load_dotenv
 import textstat
+from routing import DEFAULT_ROUTE, record_route_usage
 
 # Robustly load environment variables, handling files saved with non-UTF-8 encodings (e.g., Notepad UTF-16)
 try:
@@ -14,14 +16,12 @@ except UnicodeDecodeError:
         except UnicodeDecodeError:
             continue
 
-_openai_client = None
+_async_openai_client = None
 
+SYSTEM_PROMPT = "You are BrandBot, a helpful content assistant for Dimensions."
 
-def _get_openai_client():
-    global _openai_client
-    if _openai_client is not None:
-        return _openai_client
 
+def _get_api_key():
     # Reload env from brandbot-backend/.env so adding/updating works without restart
     try:
         import os as _os
@@ -40,22 +40,62 @@ def _get_openai_client():
     if not openai_api_key:
         # Defer failure until the first GPT call rather than on module import
         raise RuntimeError("OPENAI_API_KEY is not set. Please configure your environment.")
-    _openai_client = openai.OpenAI(api_key=openai_api_key)
-    return _openai_client
+    return openai_api_key
 
 
-def call_gpt(prompt: str):
-    client = _get_openai_client()
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You are BrandBot, a helpful content assistant for Dimensions."},
+def _get_async_openai_client():
+    global _async_openai_client
+    if _async_openai_client is None:
+        _async_openai_client = openai.AsyncOpenAI(api_key=_get_api_key())
+    return _async_openai_client
+
+
+def _completion_request(prompt: str, n: int, structured: bool, route: dict) -> dict:
+    request = {
+        "model": route["model"],
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ],
-        temperature=0.7,
-        max_tokens=2000,  # Increased to handle longer prompts with file content
-    )
-    return response.choices[0].message.content.strip()
+        "temperature": 0.7,
+        "max_tokens": route["max_tokens"],
+        "n": n,
+    }
+    if route.get("stop"):
+        request["stop"] = route["stop"]
+    if structured:
+        # Constrain the model to return a JSON object
+        request["response_format"] = {"type": "json_object"}
+    return request
+
+
+def _completion_texts(response, route: dict, started: float):
+    """Completion texts, after recording the call's latency and token usage"""
+    usage = response.usage
+    record_route_usage(
+        route["name"], time.monotonic() - started,
+        usage.prompt_tokens if usage else 0,
+        usage.completion_tokens if usage else 0,
+        len(response.choices),
+        sum(1 for choice in response.choices if choice.finish_reason == "length"))
+    return [(choice.message.content or "").strip() for choice in response.choices]
+
+
+async def acall_gpt_candidates(prompt: str, n: int, structured: bool = False,
+                               route: dict = None):
+    """Request n completions in one upstream call (the prompt is ingested once)
+
+    With structured=True the model is constrained to return a JSON object.
+    route (from routing.resolve_route) sets the model, max_tokens and stop
+    sequences; the default route is used when omitted. Cancelling the task
+    aborts the upstream request.
+    """
+    route = route or {**DEFAULT_ROUTE, "name": "default"}
+    client = _get_async_openai_client()
+    started = time.monotonic()
+    response = await client.chat.completions.create(
+        **_completion_request(prompt, n, structured, route))
+    return _completion_texts(response, route, started)
 
 
 def analyze_readability(text: str):
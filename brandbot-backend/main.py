@@ -1,27 +1,58 @@
-from fastapi import FastAPI, HTTPException, Query, UploadFile, File, Form
-from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Query, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional, Union
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from models import (
-    PromptRequest, GPTResponse, ClientCreate, ClientUpdate, Client,
+    PromptRequest, GPTResponse, Candidate, ClientCreate, ClientUpdate, Client,
     ContentRulesGlobal, ContentRulesClient, ContentRulesResponse,
-    ContentPreviewRequest, ContentPreviewResponse
+    ContentPreviewRequest, ContentPreviewResponse, DryRunResponse
 )
-from gpt_handler import call_gpt, analyze_readability
-from prompt_stack import load_business_dna, build_full_prompt
-from utils import extract_sections
+from gpt_handler import (
+    acall_gpt_candidates, analyze_readability, SYSTEM_PROMPT
+)
+from admission import (
+    AdmissionController, Overloaded, DeadlineExceeded, ClientDisconnected,
+    admitted, run_cancellable, request_deadline, RETRY_AFTER_SECONDS
+)
+from token_estimate import estimate_tokens, estimate_prompt_tokens
+from ranking import rank_candidates
+from prompt_stack import (
+    load_business_dna, dna_prompt_parts, client_prompt_parts, preview_prompt_parts
+)
+from utils import parse_content_type, document_sections
+from structured_output import (
+    parse_completion, STRUCTURED_OUTPUT_DEFAULT, STRUCTURED_OUTPUT_INSTRUCTIONS
+)
+from similarity import SimilarityIndex
+from routing import resolve_route, route_stats
 from admin_storage import (
-    load_clients, create_client, update_client, delete_client, get_client,
-    search_clients, load_content_rules, update_global_rules, update_client_rules,
-    get_client_rules
+    create_client, update_client, delete_client, get_client, load_content_rules,
+    update_global_rules, update_client_rules, get_client_rules, init_storage,
+    shutdown_storage, client_rows_json, search_client_rows, CLIENT_ROW_FIELDS
 )
+from compression import CompressionMiddleware
+from contextlib import asynccontextmanager
+import admin_stats
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Recover clients and content rules from snapshot + journal before serving
+    init_storage()
+    yield
+    # Fold the journal into the snapshots so the next start replays nothing
+    shutdown_storage()
+
+
 app = FastAPI(title="BrandBot API",
-              description="AI-powered content generation for Dimensions")
+              description="AI-powered content generation for Dimensions",
+              lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -32,6 +63,134 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Negotiated gzip/brotli for large responses
+app.add_middleware(CompressionMiddleware)
+
+# Recent generations, for opt-in reuse of near-duplicate prompts
+prompt_index = SimilarityIndex()
+
+
+# Bounds concurrent upstream generations across all generation endpoints
+admission = AdmissionController()
+
+
+async def generate_upstream(request: Request, deadline: float, prompt: str, route: dict,
+                            n: int = 1, structured: bool = False) -> List[str]:
+    """Run an upstream generation under admission control.
+
+    The call is cancelled as soon as the client disconnects or its deadline
+    passes, so its slot goes back to live requests.
+    """
+    try:
+        return await run_cancellable(
+            request,
+            admitted(admission, acall_gpt_candidates(
+                prompt, n, structured, route), deadline),
+            deadline)
+    except Overloaded:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many generation requests in progress, please retry shortly",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+    except DeadlineExceeded:
+        raise HTTPException(
+            status_code=504, detail="Request deadline exceeded before generation finished")
+    except ClientDisconnected:
+        logger.info("Client disconnected, cancelled upstream generation")
+        raise HTTPException(status_code=499, detail="Client closed request")
+
+
+def invalidate_client_generations(client_id: int):
+    """Forget remembered generations once a client's profile or document changes.
+
+    Cleanup only: their profile version no longer matches in any case.
+    """
+    prompt_index.invalidate(lambda context: context[:2] == ("client", client_id))
+
+
+def ranking_rules(client_id: Optional[int]) -> tuple:
+    """Keyword rules and content length used to rank candidates.
+
+    Client-specific rules win over the global ones. Returns
+    (mandatory_keywords, excluded_keywords, content_length).
+    """
+    rules = load_content_rules()
+    global_rules = rules["global_rules"]
+    client_rules = rules["client_rules"].get(str(client_id)) if client_id else None
+    if client_rules:
+        return (client_rules.get("mandatory_keywords") or [],
+                client_rules.get("excluded_keywords") or [],
+                client_rules.get("content_length") or global_rules.get("default_content_length"))
+    if global_rules.get("enabled", True):
+        return (global_rules.get("mandatory_keywords") or [],
+                global_rules.get("excluded_keywords") or [],
+                global_rules.get("default_content_length"))
+    return [], [], global_rules.get("default_content_length")
+
+
+def use_structured_output(requested: Optional[bool]) -> bool:
+    """Per-request structured_output flag, falling back to the server default"""
+    return STRUCTURED_OUTPUT_DEFAULT if requested is None else requested
+
+
+def dry_run_report(parts: List[str], included: dict, route: dict,
+                   candidates: int = 1) -> DryRunResponse:
+    """Describe what a generation would send upstream, without sending it"""
+    input_tokens = estimate_prompt_tokens(parts, SYSTEM_PROMPT)
+    output_budget = route["max_tokens"] * candidates
+    return DryRunResponse(
+        prompt="".join(parts),
+        model=route["model"],
+        route=route["name"],
+        input_tokens=input_tokens,
+        output_token_budget=output_budget,
+        max_total_tokens=input_tokens + output_budget,
+        included=included
+    )
+
+
+def document_report(client: Client) -> Optional[dict]:
+    """Instruction document sections included in a client prompt"""
+    if not client.instruction_document:
+        return None
+    return {
+        "filename": client.document_filename,
+        "characters": len(client.instruction_document),
+        "tokens": estimate_tokens(client.instruction_document),
+        "sections": [
+            {"title": title, "tokens": estimate_tokens(text)}
+            for title, text in document_sections(client.instruction_document)
+        ]
+    }
+
+
+def record_generation_event(req: PromptRequest, brand: str, content_type: Optional[str],
+                            reused: bool = False):
+    """Count a served generation and add it to the activity feed"""
+    client_key = req.client_id if req.client_id else f"business:{req.business_id}"
+    admin_stats.record_generation(client_key)
+    admin_stats.record_activity(
+        "content_generated",
+        f"{content_type or 'Content'} {'reused' if reused else 'generated'} for {brand}",
+        client_id=req.client_id, user="BrandBot")
+
+
+# Fields returned by /clients when the caller doesn't ask for specific ones
+SELECTION_FIELDS = ["company_name", "plan_type", "brand_tone", "audience_type"]
+
+
+def parse_fields(fields: str) -> Optional[List[str]]:
+    """Parse a comma-separated fields= projection, rejecting unknown names"""
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in CLIENT_ROW_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(CLIENT_ROW_FIELDS)}")
+    return requested
+
 
 @app.get("/")
 def read_root():
@@ -62,9 +221,10 @@ def get_business_info(business_id: str):
     return {"business_id": business_id, "dna": dna}
 
 
-@app.post("/generate", response_model=GPTResponse)
-def generate_content(req: PromptRequest):
+@app.post("/generate", response_model=Union[GPTResponse, DryRunResponse])
+async def generate_content(req: PromptRequest, request: Request):
     """Generate content based on prompt and business DNA or client profile"""
+    deadline = request_deadline(request.headers)
     try:
         logger.info(
             f"Received request: business_id={req.business_id}, client_id={req.client_id}, prompt={req.prompt[:50]}...")
@@ -78,21 +238,21 @@ def generate_content(req: PromptRequest):
                     status_code=404, detail=f"Client ID '{req.client_id}' not found")
 
             # Build prompt with client profile and document
-            client_context = (
-                f"You are an expert content writer for {client.company_name}.\n"
-                f"- Brand Tone: {client.brand_tone}\n"
-                f"- Audience Type: {client.audience_type}\n"
-                f"- Plan Type: {client.plan_type}\n"
-            )
-
-            # Add instruction document if available
-            if client.instruction_document:
-                client_context += f"\nClient Instructions:\n{client.instruction_document}\n"
-
-            client_context += f"\nUser Request: {req.prompt}\n\n"
-            client_context += "Generate a response that aligns with the client's brand, audience, and instructions above. Then explain your choices in a rationale and provide 2 marketing suggestions."
-
-            full_prompt = client_context
+            prompt_parts = client_prompt_parts(req.prompt, client)
+            included = {
+                "client_profile": {
+                    "brand_tone": client.brand_tone,
+                    "audience_type": client.audience_type,
+                    "plan_type": client.plan_type
+                },
+                "instruction_document": document_report(client)
+            }
+            audience = client.audience_type
+            brand = client.company_name
+            plan_type = client.plan_type
+            # Bumped by every profile update and document upload
+            profile_version = client.last_activity
+            full_prompt = "".join(prompt_parts)
             logger.info(
                 f"Built prompt with client profile: {len(full_prompt)} characters")
 
@@ -104,32 +264,92 @@ def generate_content(req: PromptRequest):
                     status_code=404, detail=f"Business ID '{req.business_id}' not found")
 
             # Build the full prompt
-            full_prompt = build_full_prompt(req.prompt, dna)
+            prompt_parts = dna_prompt_parts(req.prompt, dna)
+            included = {"business_dna": {
+                key: dna.get(key) for key in
+                ("brand_voice", "target_audience", "brand_positioning", "tone_guide")
+            }}
+            audience = dna.get("target_audience")
+            brand = req.business_id
+            plan_type = None
+            profile_version = None
+            full_prompt = "".join(prompt_parts)
             logger.info(
                 f"Built prompt with business DNA: {len(full_prompt)} characters")
         else:
             raise HTTPException(
                 status_code=400, detail="Either client_id or business_id must be provided")
 
-        # Call GPT
-        gpt_output = call_gpt(full_prompt)
-        logger.info(f"Received GPT response: {len(gpt_output)} characters")
-
-        # Extract sections
-        content, rationale, suggestions = extract_sections(gpt_output)
-
-        # Analyze readability
-        readability = analyze_readability(content)
-        logger.info(f"Readability analysis: {readability}")
+        structured = use_structured_output(req.structured_output)
+        if structured:
+            prompt_parts.append(STRUCTURED_OUTPUT_INSTRUCTIONS)
+            full_prompt += STRUCTURED_OUTPUT_INSTRUCTIONS
+
+        # Model, max_tokens and stop sequences for this content type and plan
+        content_type = req.content_type or parse_content_type(req.prompt)
+        route = resolve_route(content_type, plan_type)
+
+        if req.dry_run:
+            return dry_run_report(prompt_parts, included, route, req.candidates)
+
+        # Prompts are only compared within the same client, profile version
+        # and content type. The version is read before the upstream call, so a
+        # result built from a profile that changes meanwhile can never match.
+        owner = ("client", req.client_id) if req.client_id else (
+            "business", req.business_id)
+        context = (*owner, profile_version, content_type)
+        if req.reuse_similar and req.candidates == 1:
+            prior = prompt_index.lookup(context, req.prompt)
+            if prior:
+                logger.info("Reusing prior generation for an equivalent prompt")
+                record_generation_event(req, brand, content_type, reused=True)
+                return GPTResponse(**prior, reused=True)
+
+        if req.candidates > 1:
+            # One upstream call for all candidates, ranked locally
+            outputs = await generate_upstream(
+                request, deadline, full_prompt, route, req.candidates, structured)
+            logger.info(f"Received {len(outputs)} GPT candidates")
+            mandatory_keywords, excluded_keywords, content_length = ranking_rules(
+                req.client_id)
+            ranked = await run_in_threadpool(
+                rank_candidates, outputs, audience, content_length,
+                mandatory_keywords, excluded_keywords, structured)
+            best = ranked[0]
+            response = GPTResponse(
+                generated_content=best["generated_content"],
+                rationale=best["rationale"],
+                marketing_suggestions=best["marketing_suggestions"],
+                readability_score=best["readability_score"],
+                candidates=[Candidate(**candidate) for candidate in ranked]
+            )
+        else:
+            # Call GPT
+            gpt_output = (await generate_upstream(
+                request, deadline, full_prompt, route, structured=structured))[0]
+            logger.info(
+                f"Received GPT response: {len(gpt_output)} characters")
+
+            # Extract sections
+            content, rationale, suggestions = parse_completion(
+                gpt_output, structured)
+
+            # Analyze readability
+            readability = await run_in_threadpool(analyze_readability, content)
+            logger.info(f"Readability analysis: {readability}")
+
+            # Create response
+            response = GPTResponse(
+                generated_content=content,
+                rationale=rationale,
+                marketing_suggestions=suggestions,
+                readability_score=readability
+            )
 
-        # Create response
-        response = GPTResponse(
-            generated_content=content,
-            rationale=rationale,
-            marketing_suggestions=suggestions,
-            readability_score=readability
-        )
+        prompt_index.record(context, req.prompt, response.dict(
+            exclude={"reused", "candidates"}))
 
+        record_generation_event(req, brand, content_type)
         logger.info("Successfully generated response")
         return response
 
@@ -158,16 +378,20 @@ def get_clients(
     plan_type: str = Query("", description="Filter by plan type"),
     status: str = Query("", description="Filter by status"),
     page: int = Query(1, description="Page number, starting at 1"),
-    page_size: int = Query(10, description="Number of items per page")
+    page_size: int = Query(10, description="Number of items per page"),
+    fields: str = Query(
+        "", description="Comma-separated client fields to return (id is always included)")
 ):
     """Get clients with optional filtering and pagination
 
     Returns a JSON object with 'items' (list of clients for the page) and 'total' (total matching count).
     """
+    requested_fields = parse_fields(fields)
     try:
-        clients_page, total = search_clients(
-            search, plan_type, status, page, page_size)
-        return {"items": clients_page, "total": total}
+        # Rows are pre-serialized per collection version, so skip re-encoding
+        clients_page, total = search_client_rows(
+            search, plan_type, status, page, page_size, requested_fields)
+        return JSONResponse({"items": clients_page, "total": total})
     except Exception as e:
         logger.error(f"Error getting clients: {e}")
         raise HTTPException(
@@ -179,6 +403,8 @@ def create_new_client(client_data: ClientCreate):
     """Create a new client"""
     try:
         client = create_client(client_data.dict())
+        admin_stats.record_activity(
+            "client_created", f"New client '{client.company_name}' added", client.id)
         logger.info(f"Created new client: {client.company_name}")
         return client
     except Exception as e:
@@ -207,6 +433,9 @@ def update_client_by_id(client_id: int, client_update: ClientUpdate):
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
 
+        invalidate_client_generations(client_id)
+        admin_stats.record_activity(
+            "client_updated", f"Profile updated for {client.company_name}", client_id)
         logger.info(f"Updated client: {client.company_name}")
         return client
     except HTTPException:
@@ -224,6 +453,9 @@ def delete_client_by_id(client_id: int):
         if not success:
             raise HTTPException(status_code=404, detail="Client not found")
 
+        invalidate_client_generations(client_id)
+        admin_stats.record_activity(
+            "client_deleted", f"Client {client_id} deleted", client_id)
         logger.info(f"Deleted client with ID: {client_id}")
         return {"message": "Client deleted successfully"}
     except HTTPException:
@@ -276,6 +508,11 @@ async def upload_client_document(client_id: int, file: UploadFile = File(...)):
             logger.error(f"Failed to update client {client_id}")
             raise HTTPException(
                 status_code=404, detail="Client not found after update")
+        invalidate_client_generations(client_id)
+        admin_stats.record_activity(
+            "document_uploaded",
+            f"Instructions '{file.filename}' uploaded for {updated_client.company_name}",
+            client_id)
 
         logger.info(
             f"Successfully uploaded document for client {client_id}: {file.filename} ({len(document_text)} chars)")
@@ -316,24 +553,41 @@ def get_client_document(client_id: int):
             status_code=500, detail="Failed to retrieve client document")
 
 
+@app.get("/admin/stats")
+def get_admin_stats(
+    client_id: Optional[int] = Query(
+        None, description="Include this client's generations per day")
+):
+    """Dashboard counters, maintained incrementally on every change"""
+    stats = admin_stats.get_stats()
+    stats["admission"] = admission.snapshot()
+    stats["routes"] = route_stats()
+    if client_id is not None:
+        stats["client_generations_by_day"] = admin_stats.get_client_generations(
+            client_id)
+    return stats
+
+
+@app.get("/admin/activity")
+def get_admin_activity(
+    limit: int = Query(20, ge=1, le=admin_stats.ACTIVITY_LIMIT,
+                       description="Number of recent events to return")
+):
+    """Most recent create, update, delete, upload and generate events"""
+    return {"items": admin_stats.get_activity(limit)}
+
+
 @app.get("/clients")
-def get_all_clients_for_selection():
+def get_all_clients_for_selection(
+    fields: str = Query(
+        "", description="Comma-separated client fields to return (id is always included)")
+):
     """Get all active clients for client-side selection"""
+    requested_fields = parse_fields(fields) or SELECTION_FIELDS
     try:
-        # Exclude documents for faster loading - not needed for selection dropdown
-        clients = load_clients(exclude_documents=True)
-        active_clients = [
-            client for client in clients if client.status == "active"]
-        return [
-            {
-                "id": client.id,
-                "company_name": client.company_name,
-                "plan_type": client.plan_type,
-                "brand_tone": client.brand_tone,
-                "audience_type": client.audience_type
-            }
-            for client in active_clients
-        ]
+        # Encoded once per collection version; documents are never included
+        return Response(client_rows_json(requested_fields, status="active"),
+                        media_type="application/json")
     except Exception as e:
         logger.error(f"Error getting clients for selection: {e}")
         raise HTTPException(
@@ -393,9 +647,10 @@ def update_client_content_rules(client_id: int, client_rules: ContentRulesClient
             status_code=500, detail="Failed to update client content rules")
 
 
-@app.post("/admin/content-preview", response_model=ContentPreviewResponse)
-def preview_content_generation(preview_request: ContentPreviewRequest):
+@app.post("/admin/content-preview", response_model=Union[ContentPreviewResponse, DryRunResponse])
+async def preview_content_generation(preview_request: ContentPreviewRequest, request: Request):
     """Preview content generation with specific rules"""
+    deadline = request_deadline(request.headers)
     try:
         # Build a custom prompt based on the rules
         tone = preview_request.tone
@@ -406,29 +661,46 @@ def preview_content_generation(preview_request: ContentPreviewRequest):
         marketing_suggestions = preview_request.marketing_suggestions
 
         # Create a custom prompt
-        custom_prompt = f"""
-        Generate content with the following specifications:
-        - Tone: {tone}
-        - Audience: {audience}
-        - Content Length: {content_length}
-        - Mandatory Keywords: {', '.join(mandatory_keywords) if mandatory_keywords else 'None'}
-        - Excluded Keywords: {', '.join(excluded_keywords) if excluded_keywords else 'None'}
-        - Marketing Suggestions: {'Enabled' if marketing_suggestions else 'Disabled'}
-        
-        User Request: {preview_request.sample_prompt}
-        
-        Generate a response that aligns with the above specifications. Then explain your choices in a rationale and provide 2 marketing suggestions.
-        """
-
-        # Call GPT with custom prompt
-        gpt_output = call_gpt(custom_prompt)
-
-        # Extract sections
-        content, rationale, suggestions = extract_sections(gpt_output)
+        prompt_parts = preview_prompt_parts(preview_request)
+        structured = use_structured_output(preview_request.structured_output)
+        if structured:
+            prompt_parts.append(STRUCTURED_OUTPUT_INSTRUCTIONS)
+        route = resolve_route(
+            preview_request.content_type or parse_content_type(preview_request.sample_prompt))
+        if preview_request.dry_run:
+            return dry_run_report(prompt_parts, {"rules": {
+                "tone": tone,
+                "audience": audience,
+                "content_length": content_length,
+                "mandatory_keywords": mandatory_keywords,
+                "excluded_keywords": excluded_keywords,
+                "marketing_suggestions": marketing_suggestions
+            }}, route, preview_request.candidates)
+        custom_prompt = "".join(prompt_parts)
+
+        candidates = None
+        if preview_request.candidates > 1:
+            # One upstream call for all candidates, ranked locally
+            outputs = await generate_upstream(
+                request, deadline, custom_prompt, route, preview_request.candidates, structured)
+            ranked = await run_in_threadpool(
+                rank_candidates, outputs, audience, content_length,
+                mandatory_keywords, excluded_keywords, structured)
+            content = ranked[0]["generated_content"]
+            candidates = [Candidate(**candidate) for candidate in ranked]
+        else:
+            # Call GPT with custom prompt
+            gpt_output = (await generate_upstream(
+                request, deadline, custom_prompt, route, structured=structured))[0]
+
+            # Extract sections
+            content, rationale, suggestions = parse_completion(
+                gpt_output, structured)
 
         # Create response
         return ContentPreviewResponse(
             generated_content=content,
+            candidates=candidates,
             settings_used={
                 "tone": tone,
                 "audience": audience,
@@ -439,6 +711,8 @@ def preview_content_generation(preview_request: ContentPreviewRequest):
             }
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating content preview: {e}")
         raise HTTPException(
@@ -1,17 +1,35 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
+# Upper bound on completions requested in one upstream call
+MAX_CANDIDATES = 5
+
 class PromptRequest(BaseModel):
     prompt: str
     business_id: Optional[str] = None  # Keep for backward compatibility
     client_id: Optional[int] = None  # New: client ID for client-based generation
+    reuse_similar: bool = False  # Opt-in: return a prior generation for an equivalent prompt
+    candidates: int = Field(1, ge=1, le=MAX_CANDIDATES)  # Completions to generate and rank
+    dry_run: bool = False  # Render the prompt and estimate tokens without calling GPT
+    structured_output: Optional[bool] = None  # Ask for JSON sections; None uses the server default
+    content_type: Optional[str] = None  # Selects the model route; parsed from "Content Type:" in the prompt if omitted
+
+class Candidate(BaseModel):
+    generated_content: str
+    rationale: str
+    marketing_suggestions: str
+    readability_score: dict
+    score: float  # Weighted local ranking score, 0-1
+    score_breakdown: dict  # Per-criterion scores: grade, keywords, length
 
 class GPTResponse(BaseModel):
     generated_content: str
     rationale: str
     marketing_suggestions: str
     readability_score: dict
+    reused: bool = False  # True when served from a prior request with an equivalent prompt
+    candidates: Optional[List[Candidate]] = None  # All ranked candidates, best first
 
 # Admin Models
 class ClientCreate(BaseModel):
@@ -80,7 +98,22 @@ class ContentPreviewRequest(BaseModel):
     content_length: str = "medium"
     marketing_suggestions: bool = True
     sample_prompt: str = "Write a product description"
+    candidates: int = Field(1, ge=1, le=MAX_CANDIDATES)  # Completions to generate and rank
+    dry_run: bool = False  # Render the prompt and estimate tokens without calling GPT
+    structured_output: Optional[bool] = None  # Ask for JSON sections; None uses the server default
+    content_type: Optional[str] = None  # Selects the model route; parsed from the sample prompt if omitted
 
 class ContentPreviewResponse(BaseModel):
     generated_content: str
     settings_used: dict
+    candidates: Optional[List[Candidate]] = None  # All ranked candidates, best first
+
+class DryRunResponse(BaseModel):
+    dry_run: bool = True
+    prompt: str  # Exact user prompt that would be sent
+    model: str
+    route: str = "default"  # Content-type route that picked the model and budget
+    input_tokens: int  # Offline estimate, including the system message
+    output_token_budget: int  # max_tokens across all requested candidates
+    max_total_tokens: int
+    included: dict  # Rules, profile fields and document sections in the prompt
@@ -8,14 +8,62 @@ def load_business_dna(business_id: str):
         dna = json.load(f)
     return dna.get(business_id, {})
 
-def build_full_prompt(user_prompt: str, dna: dict):
-    context = (
+# Each *_prompt_parts builder returns [prefix, request, instructions]; joined
+# they form the exact prompt sent upstream. The prefix depends only on the
+# brand (or rules) and is what token estimates are cached on.
+
+def dna_prompt_parts(user_prompt: str, dna: dict):
+    prefix = (
         f"You are an expert content writer for a brand with the following traits:\n"
         f"- Voice: {dna.get('brand_voice')}\n"
         f"- Target Audience: {dna.get('target_audience')}\n"
         f"- Brand Positioning: {dna.get('brand_positioning')}\n"
         f"- Tone Guide: {dna.get('tone_guide')}\n\n"
-        f"User Request: {user_prompt}\n\n"
-        f"Generate a response that aligns with the above. Then explain your choices in a rationale and provide 2 marketing suggestions."
     )
-    return context
+    return [
+        prefix,
+        f"User Request: {user_prompt}\n\n",
+        "Generate a response that aligns with the above. Then explain your choices in a rationale and provide 2 marketing suggestions."
+    ]
+
+def build_full_prompt(user_prompt: str, dna: dict):
+    return "".join(dna_prompt_parts(user_prompt, dna))
+
+def client_prompt_parts(user_prompt: str, client):
+    prefix = (
+        f"You are an expert content writer for {client.company_name}.\n"
+        f"- Brand Tone: {client.brand_tone}\n"
+        f"- Audience Type: {client.audience_type}\n"
+        f"- Plan Type: {client.plan_type}\n"
+    )
+
+    # Add instruction document if available
+    if client.instruction_document:
+        prefix += f"\nClient Instructions:\n{client.instruction_document}\n"
+
+    return [
+        prefix,
+        f"\nUser Request: {user_prompt}\n\n",
+        "Generate a response that aligns with the client's brand, audience, and instructions above. Then explain your choices in a rationale and provide 2 marketing suggestions."
+    ]
+
+def preview_prompt_parts(preview_request):
+    mandatory_keywords = preview_request.mandatory_keywords
+    excluded_keywords = preview_request.excluded_keywords
+    prefix = (
+        "\n"
+        "        Generate content with the following specifications:\n"
+        f"        - Tone: {preview_request.tone}\n"
+        f"        - Audience: {preview_request.audience}\n"
+        f"        - Content Length: {preview_request.content_length}\n"
+        f"        - Mandatory Keywords: {', '.join(mandatory_keywords) if mandatory_keywords else 'None'}\n"
+        f"        - Excluded Keywords: {', '.join(excluded_keywords) if excluded_keywords else 'None'}\n"
+        f"        - Marketing Suggestions: {'Enabled' if preview_request.marketing_suggestions else 'Disabled'}\n"
+        "        \n"
+        "        "
+    )
+    return [
+        prefix,
+        f"User Request: {preview_request.sample_prompt}\n        \n        ",
+        "Generate a response that aligns with the above specifications. Then explain your choices in a rationale and provide 2 marketing suggestions.\n        "
+    ]
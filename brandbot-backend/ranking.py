@@ -0,0 +1,93 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List
+
+from gpt_handler import analyze_readability
+from structured_output import parse_completion
+
+# Flesch-Kincaid grade each audience reads most comfortably
+TARGET_GRADE_BY_AUDIENCE = {
+    "b2b": 10,
+    "b2c": 7,
+    "mixed": 8,
+    "technical": 12,
+    "general": 8,
+}
+DEFAULT_TARGET_GRADE = 8
+
+# Word-count window for each content_length setting
+LENGTH_WORDS = {
+    "short": (50, 150),
+    "medium": (150, 400),
+    "long": (400, 1000),
+}
+
+# Relative weight of each criterion in the overall score
+WEIGHTS = {"grade": 0.4, "keywords": 0.4, "length": 0.2}
+
+_analysis_pool = ThreadPoolExecutor(max_workers=4,
+                                    thread_name_prefix="candidate-analysis")
+
+
+def _contains(text: str, keyword: str) -> bool:
+    return re.search(rf"\b{re.escape(keyword.lower())}\b", text) is not None
+
+
+def grade_fit(grade_level: float, audience: str) -> float:
+    """1.0 on the audience's target grade, losing 0.15 per grade away"""
+    target = TARGET_GRADE_BY_AUDIENCE.get(
+        (audience or "").lower(), DEFAULT_TARGET_GRADE)
+    return max(0.0, 1 - abs(grade_level - target) * 0.15)
+
+
+def keyword_compliance(content: str, mandatory: List[str], excluded: List[str]) -> float:
+    """Fraction of keyword rules satisfied (1.0 when there are no rules)"""
+    text = content.lower()
+    mandatory = [keyword for keyword in mandatory if keyword.strip()]
+    excluded = [keyword for keyword in excluded if keyword.strip()]
+    checks = [_contains(text, keyword) for keyword in mandatory]
+    checks += [not _contains(text, keyword) for keyword in excluded]
+    return sum(checks) / len(checks) if checks else 1.0
+
+
+def length_fit(content: str, content_length: str) -> float:
+    """1.0 inside the content_length window, decaying with relative distance"""
+    low, high = LENGTH_WORDS.get(
+        (content_length or "").lower(), LENGTH_WORDS["medium"])
+    words = len(content.split())
+    if low <= words <= high:
+        return 1.0
+    bound = low if words < low else high
+    return max(0.0, 1 - abs(words - bound) / bound)
+
+
+def _analyze(output: str, structured: bool) -> dict:
+    content, rationale, suggestions = parse_completion(output, structured)
+    return {
+        "generated_content": content,
+        "rationale": rationale,
+        "marketing_suggestions": suggestions,
+        "readability_score": analyze_readability(content),
+    }
+
+
+def rank_candidates(outputs: List[str], audience: str, content_length: str,
+                    mandatory_keywords: List[str], excluded_keywords: List[str],
+                    structured: bool = False) -> List[dict]:
+    """Split, analyze and score raw completions; best candidate first"""
+    candidates = list(_analysis_pool.map(
+        partial(_analyze, structured=structured), outputs))
+    for candidate in candidates:
+        content = candidate["generated_content"]
+        breakdown = {
+            "grade": grade_fit(candidate["readability_score"]["grade_level"], audience),
+            "keywords": keyword_compliance(content, mandatory_keywords, excluded_keywords),
+            "length": length_fit(content, content_length),
+        }
+        candidate["score_breakdown"] = {
+            name: round(value, 3) for name, value in breakdown.items()}
+        candidate["score"] = round(
+            sum(WEIGHTS[name] * value for name, value in breakdown.items()), 3)
+    candidates.sort(key=lambda candidate: candidate["score"], reverse=True)
+    return candidates
@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+from typing import Optional
+
+# Settings used when no route matches (and the base every route extends)
+DEFAULT_ROUTE = {
+    "model": "gpt-4o-mini",
+    "max_tokens": 2000,  # Increased to handle longer prompts with file content
+    "stop": None,
+}
+
+# Per content type overrides, keyed by the lowercased names in the frontend's
+# content-type dropdown. Budgets cover the content plus the rationale and
+# marketing suggestions. A route may also hold "plans": {plan_type: overrides}.
+ROUTES = {
+    "social post": {"max_tokens": 500},
+    "linkedin post": {"max_tokens": 700},
+    "email": {"max_tokens": 900},
+    "pr article": {"max_tokens": 1500},
+    "deck": {"max_tokens": 1500},
+    "blog": {"max_tokens": 2000},
+    "seo article": {"max_tokens": 2000},
+}
+
+# Optional JSON file with the same shape as ROUTES; its entries replace or
+# add to the built-in ones so the table can be tuned without a deploy
+ROUTES_FILE = os.getenv("BRANDBOT_ROUTES_FILE")
+if ROUTES_FILE:
+    try:
+        with open(ROUTES_FILE, "r") as f:
+            ROUTES.update({key.lower(): value for key, value in json.load(f).items()})
+    except Exception as e:
+        print(f"Error loading routes file {ROUTES_FILE}: {e}")
+
+_lock = threading.Lock()
+# route name -> accumulated usage
+_usage = {}
+
+
+def resolve_route(content_type: Optional[str], plan_type: Optional[str] = None) -> dict:
+    """Model, max_tokens and stop sequences for a content type and plan.
+
+    The plan-specific entry wins over the content type's, which wins over
+    DEFAULT_ROUTE. The returned dict also carries the route's "name".
+    """
+    key = (content_type or "").strip().lower()
+    route = ROUTES.get(key)
+    if route is None:
+        return {**DEFAULT_ROUTE, "name": "default"}
+    resolved = {**DEFAULT_ROUTE, **route, "name": key}
+    plan_route = (route.get("plans") or {}).get(plan_type) if plan_type else None
+    if plan_route:
+        resolved.update(plan_route)
+        resolved["name"] = f"{key}/{plan_type}"
+    resolved.pop("plans", None)
+    return resolved
+
+
+def record_route_usage(route_name: str, latency: float, prompt_tokens: int,
+                       completion_tokens: int, completions: int, truncated: int):
+    """Accumulate one upstream call's latency and token usage for a route"""
+    with _lock:
+        usage = _usage.setdefault(route_name, {
+            "requests": 0, "completions": 0, "truncated": 0,
+            "latency_total": 0.0, "latency_max": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0
+        })
+        usage["requests"] += 1
+        usage["completions"] += completions
+        usage["truncated"] += truncated
+        usage["latency_total"] += latency
+        usage["latency_max"] = max(usage["latency_max"], latency)
+        usage["prompt_tokens"] += prompt_tokens
+        usage["completion_tokens"] += completion_tokens
+
+
+def route_stats() -> dict:
+    """Per-route averages for tuning the table"""
+    with _lock:
+        return {
+            name: {
+                "requests": usage["requests"],
+                "avg_latency_ms": round(usage["latency_total"] / usage["requests"] * 1000),
+                "max_latency_ms": round(usage["latency_max"] * 1000),
+                "avg_prompt_tokens": round(usage["prompt_tokens"] / usage["requests"]),
+                "avg_completion_tokens": round(usage["completion_tokens"] / usage["completions"]),
+                # Completions cut off at max_tokens; a high share means the budget is too tight
+                "truncated": usage["truncated"],
+            }
+            for name, usage in _usage.items()
+        }
@@ -0,0 +1,104 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+# Maximum number of remembered generations across all clients
+SIMILARITY_INDEX_SIZE = int(os.getenv("BRANDBOT_SIMILARITY_INDEX_SIZE", "512"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Dashboard boilerplate; the content type is already part of the lookup context
+_BOILERPLATE_RE = re.compile(r"^\s*content type:.*$|content goal:", re.IGNORECASE | re.MULTILINE)
+# Words that don't change what is being asked for. Negations ("not", "no",
+# "without") and numbers are deliberately kept.
+STOPWORDS = frozenset(
+    "a an the this that these those our my your their its we us you i me "
+    "please do does can could would will should is are be to of for on in at "
+    "by with and or about some".split())
+# Words ending in "s" that aren't plurals of another word
+_NOT_PLURAL = frozenset(
+    "news goods series species means analytics physics economics politics "
+    "ethics thanks always perhaps".split())
+_SIBILANT_PLURAL = ("sses", "shes", "ches", "xes", "zes")
+
+
+def singular(token: str) -> str:
+    """Conservative English singular: a wrong guess may miss a duplicate but
+    never merges two different words"""
+    if len(token) <= 3 or token in _NOT_PLURAL or token.endswith(("ss", "us", "is")):
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith(_SIBILANT_PLURAL):
+        return token[:-2]
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def normalize_prompt(prompt: str) -> Tuple[str, ...]:
+    """Key terms of a prompt, in order: lowercase word tokens without the
+    dashboard labels or stopwords, made singular, with "n't" spelled out as
+    "not"
+    """
+    text = _BOILERPLATE_RE.sub(" ", prompt).lower().replace("n't", " not")
+    return tuple(singular(token) for token in _TOKEN_RE.findall(text)
+                 if token not in STOPWORDS)
+
+
+class SimilarityIndex:
+    """Bounded LRU of recent generations, keyed by context and normalized prompt.
+
+    A context identifies everything besides the user prompt that shapes the
+    output (client or business id, profile version, content type). Two
+    prompts match only if their key terms are the same words in the same
+    order, so case, punctuation, stopwords and plurals may differ but a
+    changed number, negation, name or word order never matches.
+    """
+
+    def __init__(self, max_entries: int = SIMILARITY_INDEX_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (context, key terms) -> result, in LRU order
+        self._entries: "OrderedDict[Tuple[Hashable, tuple], dict]" = OrderedDict()
+        # context -> key terms currently stored for it
+        self._by_context: Dict[Hashable, set] = {}
+
+    def lookup(self, context: Hashable, prompt: str) -> Optional[dict]:
+        """Return the prior result for an equivalent prompt, if any"""
+        key = (context, normalize_prompt(prompt))
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def record(self, context: Hashable, prompt: str, result: dict):
+        terms = normalize_prompt(prompt)
+        if not terms:
+            return
+        key = (context, terms)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            self._by_context.setdefault(context, set()).add(terms)
+            while len(self._entries) > self.max_entries:
+                (old_context, old_terms), _ = self._entries.popitem(last=False)
+                self._forget(old_context, old_terms)
+
+    def invalidate(self, match) -> int:
+        """Drop every context for which match(context) is true"""
+        with self._lock:
+            contexts = [context for context in self._by_context if match(context)]
+            for context in contexts:
+                for terms in self._by_context.pop(context):
+                    self._entries.pop((context, terms), None)
+            return len(contexts)
+
+    def _forget(self, context: Hashable, terms: tuple):
+        stored = self._by_context.get(context)
+        if stored is not None:
+            stored.discard(terms)
+            if not stored:
+                del self._by_context[context]
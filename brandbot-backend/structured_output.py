@@ -0,0 +1,181 @@
+import json
+import os
+import re
+from json.decoder import scanstring
+
+import admin_stats
+from utils import extract_sections
+
+# Default for requests that don't set structured_output explicitly
+STRUCTURED_OUTPUT_DEFAULT = os.getenv(
+    "BRANDBOT_STRUCTURED_OUTPUT", "false").lower() in ("1", "true", "yes")
+
+# Appended to the prompt in structured mode; the upstream call also asks for
+# a JSON object response format
+STRUCTURED_OUTPUT_INSTRUCTIONS = (
+    "\n\nRespond only with a JSON object with three string fields: "
+    "\"content\" (the generated content), \"rationale\" (why you made these choices) "
+    "and \"suggestions\" (the marketing suggestions)."
+)
+
+NOT_AVAILABLE = "Not available"
+
+_STRING_CHUNK = re.compile(r'[^"\\]*')
+_SURROGATE = re.compile("[\ud800-\udfff]")
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b",
+            "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_WHITESPACE = " \t\r\n"
+_decoder = json.JSONDecoder()
+
+
+def _skip_whitespace(text: str, i: int) -> int:
+    n = len(text)
+    while i < n and text[i] in _WHITESPACE:
+        i += 1
+    return i
+
+
+def _read_string(text: str, i: int):
+    """Read a JSON string starting at its opening quote.
+
+    Returns (value, next_index, closed); on truncation the partial value is
+    returned with closed=False.
+    """
+    try:
+        # Complete literals go through the stdlib decoder (which also joins
+        # surrogate pairs); only a truncated tail is decoded by hand
+        value, end = scanstring(text, i + 1, False)
+        return _join_surrogates(value), end, True
+    except ValueError:
+        pass
+    chunks = []
+    n = len(text)
+    i += 1
+    while i < n:
+        match = _STRING_CHUNK.match(text, i)
+        chunks.append(match.group())
+        i = match.end()
+        if i >= n:
+            break
+        if text[i] == '"':
+            return _join_surrogates("".join(chunks)), i + 1, True
+        # Backslash escape
+        if i + 1 >= n:
+            break
+        escape = text[i + 1]
+        if escape == "u":
+            digits = text[i + 2:i + 6]
+            if len(digits) < 4:
+                break
+            try:
+                chunks.append(chr(int(digits, 16)))
+            except ValueError:
+                chunks.append(digits)
+            i += 6
+        else:
+            chunks.append(_ESCAPES.get(escape, escape))
+            i += 2
+    return _join_surrogates("".join(chunks)), n, False
+
+
+def _join_surrogates(value: str) -> str:
+    """Combine \\uXXXX surrogate pairs decoded one escape at a time (e.g. an
+    emoji) and replace lone halves, which can't be encoded as UTF-8"""
+    if not _SURROGATE.search(value):
+        return value
+    return value.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+
+
+def _read_value(text: str, i: int):
+    """Read a field value; strings and arrays of strings are kept as text"""
+    if text[i] == '"':
+        return _read_string(text, i)
+    if text[i] == "[":
+        items = []
+        i += 1
+        n = len(text)
+        while True:
+            i = _skip_whitespace(text, i)
+            if i >= n:
+                return "\n".join(items), n, False
+            if text[i] == "]":
+                return "\n".join(items), i + 1, True
+            if text[i] == ",":
+                i += 1
+                continue
+            item, i, closed = _read_value(text, i)
+            if item:
+                items.append(str(item))
+            if not closed:
+                return "\n".join(items), n, False
+    try:
+        value, end = _decoder.raw_decode(text, i)
+    except ValueError:
+        return None, len(text), False
+    return (value if isinstance(value, str) else json.dumps(value)), end, True
+
+
+def parse_structured_sections(text: str):
+    """Single-pass parse of a {"content", "rationale", "suggestions"} object.
+
+    Tolerates leading prose or code fences and a completion cut off at
+    max_tokens: fields read so far (including a partial final value) are
+    returned. Returns (fields, complete), or None if no object was found.
+    """
+    i = text.find("{")
+    if i < 0:
+        return None
+    fields = {}
+    n = len(text)
+    i += 1
+    while True:
+        i = _skip_whitespace(text, i)
+        if i >= n:
+            return fields, False
+        if text[i] == "}":
+            return fields, True
+        if text[i] == ",":
+            i += 1
+            continue
+        if text[i] != '"':
+            # Not a JSON object after all
+            return (fields, False) if fields else None
+        key, i, closed = _read_string(text, i)
+        i = _skip_whitespace(text, i)
+        if not closed or i >= n or text[i] != ":":
+            return fields, False
+        i = _skip_whitespace(text, i + 1)
+        if i >= n:
+            return fields, False
+        value, i, closed = _read_value(text, i)
+        if value is not None:
+            fields[key] = value
+        if not closed:
+            return fields, False
+
+
+def parse_completion(text: str, structured: bool):
+    """Split a completion into (content, rationale, suggestions).
+
+    Structured completions go through the JSON parser and only fall back to
+    the legacy marker splitter when no content can be recovered. Every
+    outcome is counted in admin_stats.
+    """
+    if structured:
+        parsed = parse_structured_sections(text)
+        if parsed is not None:
+            fields, complete = parsed
+            content = (fields.get("content") or "").strip()
+            if content:
+                admin_stats.record_parse_outcome(
+                    "structured" if complete else "structured_truncated")
+                return (content,
+                        (fields.get("rationale") or "").strip() or NOT_AVAILABLE,
+                        (fields.get("suggestions") or "").strip() or NOT_AVAILABLE)
+        admin_stats.record_parse_outcome("structured_fallback")
+
+    content, rationale, suggestions = extract_sections(text)
+    if not structured:
+        admin_stats.record_parse_outcome(
+            "legacy_missing_markers" if rationale == NOT_AVAILABLE else "legacy")
+    return content, rationale, suggestions
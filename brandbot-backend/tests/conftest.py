@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# Backend modules are imported flat, as main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import admin_storage  # noqa: E402
+
+
+def restart_storage():
+    """Drop in-memory state as if the process had crashed"""
+    if admin_storage._journal is not None:
+        admin_storage._journal.close()
+    admin_storage._journal = None
+    admin_storage._loaded = False
+    admin_storage._journal_entries = 0
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """admin_storage backed by files in a temporary directory"""
+    monkeypatch.setattr(admin_storage, "BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(admin_storage, "CLIENTS_FILE", str(tmp_path / "clients.json"))
+    monkeypatch.setattr(admin_storage, "CONTENT_RULES_FILE", str(tmp_path / "content_rules.json"))
+    monkeypatch.setattr(admin_storage, "JOURNAL_FILE", str(tmp_path / "journal.log"))
+    monkeypatch.setattr(admin_storage, "COMPACTING_FILE", str(tmp_path / "journal.log.compacting"))
+    restart_storage()
+    yield admin_storage
+    restart_storage()
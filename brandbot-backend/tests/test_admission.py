@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+
+from admission import (
+    AdmissionController, ClientDisconnected, DeadlineExceeded, Overloaded,
+    admitted, run_cancellable
+)
+
+
+class FakeRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+async def generation(seconds=0.5):
+    await asyncio.sleep(seconds)
+    return "done"
+
+
+def start(controller, deadline, request=None):
+    return asyncio.ensure_future(run_cancellable(
+        request or FakeRequest(), admitted(controller, generation(), deadline), deadline))
+
+
+def test_queued_requests_that_time_out_are_all_counted():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=10)
+        busy = start(controller, time.monotonic() + 5)
+        await asyncio.sleep(0.05)
+        queued = [start(controller, time.monotonic() + 0.2) for _ in range(5)]
+        results = await asyncio.gather(*queued, return_exceptions=True)
+        assert all(isinstance(result, DeadlineExceeded) for result in results)
+        assert controller.snapshot()["expired"] == 5
+        assert controller.snapshot()["waiting"] == 0
+        assert await busy == "done"
+        assert controller.snapshot()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_is_rejected_and_disconnects_are_not_expiries():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1)
+        busy = start(controller, time.monotonic() + 5)
+        await asyncio.sleep(0.05)
+        request = FakeRequest()
+        queued = start(controller, time.monotonic() + 5, request)
+        await asyncio.sleep(0.05)
+        with pytest.raises(Overloaded):
+            await start(controller, time.monotonic() + 5)
+
+        request.disconnected = True
+        with pytest.raises(ClientDisconnected):
+            await queued
+        snapshot = controller.snapshot()
+        assert snapshot["rejected"] == 1 and snapshot["expired"] == 0
+        assert await busy == "done"
+
+    asyncio.run(scenario())
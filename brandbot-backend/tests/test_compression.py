@@ -0,0 +1,24 @@
+import pytest
+
+import compression
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip; q=0.0, identity", None),
+    ("br;q=0, gzip", "gzip"),
+    ("*", "gzip"),
+    ("*, gzip;q=0", None),
+    ("identity", None),
+    ("", None),
+])
+def test_gzip_negotiation(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert compression.choose_encoding(header) == expected
+
+
+def test_brotli_preferred_when_installed(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert compression.choose_encoding("gzip, br") == "br"
+    assert compression.choose_encoding("br;q=0, gzip") == "gzip"
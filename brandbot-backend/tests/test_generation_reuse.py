@@ -0,0 +1,71 @@
+import types
+
+import pytest
+from fastapi.testclient import TestClient
+
+import gpt_handler
+import main
+
+PROMPT = "Content Type: Email\nContent Goal: Welcome new subscribers"
+
+
+class FakeCompletions:
+    """Upstream stand-in; on_call runs while the "request" is in flight"""
+
+    def __init__(self):
+        self.calls = 0
+        self.on_call = None
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        if self.on_call:
+            self.on_call()
+        message = types.SimpleNamespace(content=f"Draft {self.calls}")
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=message, finish_reason="stop")],
+            usage=None)
+
+
+@pytest.fixture
+def app(storage, monkeypatch):
+    completions = FakeCompletions()
+    monkeypatch.setattr(gpt_handler, "_async_openai_client", types.SimpleNamespace(
+        chat=types.SimpleNamespace(completions=completions)))
+    monkeypatch.setattr(main, "analyze_readability",
+                        lambda text: {"grade_level": 8.0, "sentence_length": 12.0})
+    monkeypatch.setattr(main, "prompt_index", main.SimilarityIndex())
+    client = storage.create_client({
+        "company_name": "Acme", "contact_person": "Ann", "email": "ann@example.com",
+        "plan_type": "Basic", "brand_tone": "Friendly", "audience_type": "B2B",
+        "marketing_suggestions": True
+    })
+    # No lifespan: the storage fixture already points at a temporary directory
+    return TestClient(main.app), completions, client.id
+
+
+def generate(http, client_id):
+    response = http.post("/generate", json={
+        "prompt": PROMPT, "client_id": client_id, "reuse_similar": True})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_equivalent_prompt_is_reused(app):
+    http, completions, client_id = app
+    first = generate(http, client_id)
+    second = generate(http, client_id)
+    assert completions.calls == 1
+    assert second["reused"] and second["generated_content"] == first["generated_content"]
+
+
+def test_profile_change_during_generation_is_not_reused(app):
+    http, completions, client_id = app
+    # The profile changes while the first generation is upstream
+    completions.on_call = lambda: http.put(
+        f"/admin/clients/{client_id}", json={"brand_tone": "Formal"})
+    generate(http, client_id)
+    completions.on_call = None
+
+    second = generate(http, client_id)
+    assert completions.calls == 2
+    assert not second["reused"]
@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+from conftest import restart_storage as restart
+
+
+def create(storage, name):
+    return storage.create_client({
+        "company_name": name, "contact_person": "Ann", "email": "ann@example.com",
+        "plan_type": "Basic", "brand_tone": "Friendly", "audience_type": "B2B",
+        "marketing_suggestions": True
+    })
+
+
+def write_entries(storage):
+    create(storage, "One")
+    create(storage, "Two")
+    storage.update_global_rules({"mandatory_keywords": ["eco"]})
+    storage.update_client_rules(1, {"content_length": "short"})
+    create(storage, "Three")
+
+
+def test_torn_tail_is_truncated(storage):
+    write_entries(storage)
+    restart()
+    with open(storage.JOURNAL_FILE, "ab") as f:
+        f.write(b'{"op":"client_create","cli')
+
+    assert [c.company_name for c in storage.load_clients()] == ["One", "Two", "Three"]
+    assert storage.load_content_rules()["global_rules"]["mandatory_keywords"] == ["eco"]
+    with open(storage.JOURNAL_FILE, "rb") as f:
+        lines = f.read().split(b"\n")
+    assert lines[-1] == b"" and len(lines) == 6
+
+
+def test_corrupt_middle_entry_stops_recovery(storage):
+    write_entries(storage)
+    restart()
+    with open(storage.JOURNAL_FILE, "rb") as f:
+        original = f.read()
+    lines = original.split(b"\n")
+    lines[1] = b'{"op":"client_create", garbage'
+    with open(storage.JOURNAL_FILE, "wb") as f:
+        f.write(b"\n".join(lines))
+
+    with pytest.raises(storage.JournalCorrupted):
+        storage.load_clients()
+    with open(storage.JOURNAL_FILE, "rb") as f:
+        assert f.read() == b"\n".join(lines)
+
+
+def test_leftover_compacting_journal_is_replayed_first(storage):
+    create(storage, "One")
+    create(storage, "Two")
+    restart()
+    # Crash after rotation but before the snapshots were written
+    os.replace(storage.JOURNAL_FILE, storage.COMPACTING_FILE)
+    storage.update_client(2, {"company_name": "Two renamed"})
+    storage.delete_client(1)
+    restart()
+
+    assert [(c.id, c.company_name) for c in storage.load_clients()] == [(2, "Two renamed")]
+
+    # A later compaction folds both journals into the snapshots
+    assert storage.compact()
+    restart()
+    with open(storage.CLIENTS_FILE) as f:
+        assert [c["company_name"] for c in json.load(f)] == ["Two renamed"]
+    assert [c.company_name for c in storage.load_clients()] == ["Two renamed"]
+
+
+def test_rule_changes_keep_client_row_cache(storage):
+    create(storage, "One")
+    rows = storage.client_rows()
+    storage.update_client_rules(1, {"content_length": "short"})
+    assert storage.client_rows() is rows
@@ -0,0 +1,70 @@
+import pytest
+
+from similarity import SimilarityIndex, normalize_prompt, singular
+
+PREFIX = "Content Type: Social Post\nContent Goal: "
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Promote our eco product on LinkedIn", "Please promote our eco product on LinkedIn"),
+    ("Promote our eco product on LinkedIn", "promote our eco product on linkedin!"),
+    ("Write a welcome email for new subscribers", "Write a welcome email for our new subscribers"),
+    ("Announce the launch of our new running shoe", "Announce the launch of our new running shoes"),
+    ("Don't mention pricing", "Do not mention pricing"),
+])
+def test_equivalent_prompts_reuse(first, second):
+    index = SimilarityIndex()
+    index.record("ctx", PREFIX + first, {"generated_content": first})
+    assert index.lookup("ctx", PREFIX + second) == {"generated_content": first}
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Announce our summer sale with 20% off", "Announce our summer sale with 50% off"),
+    ("Write about our new plan. Do mention pricing", "Write about our new plan. Do not mention pricing"),
+    ("Announce the launch of product A", "Announce the launch of product B"),
+    ("Invite customers to switch from Plan Pro to Plan Enterprise",
+     "Invite customers to switch from Plan Enterprise to Plan Pro"),
+    ("Move the webinar from Tuesday to Friday", "Move the webinar from Friday to Tuesday"),
+    ("Explain why email beats social", "Explain why social beats email"),
+    ("Write a welcome email for new subscribers", "Write a welcome email for churned subscribers"),
+    ("Announce our summer sale with 20% off", "Announce our summer sale with 20% off everything"),
+    ("Promote our eco product on LinkedIn", "Promote our eco-friendly product on LinkedIn"),
+    ("Share the latest news", "Share the latest new"),
+])
+def test_different_prompts_do_not_reuse(first, second):
+    index = SimilarityIndex()
+    index.record("ctx", PREFIX + first, {"generated_content": first})
+    assert index.lookup("ctx", PREFIX + second) is None
+
+
+def test_lookup_is_scoped_to_context():
+    index = SimilarityIndex()
+    index.record(("client", 1, None, "Email"), "Welcome email", {"generated_content": "x"})
+    assert index.lookup(("client", 2, None, "Email"), "Welcome email") is None
+    assert index.lookup(("client", 1, None, "Blog"), "Welcome email") is None
+
+
+def test_lru_eviction_and_invalidation():
+    index = SimilarityIndex(max_entries=2)
+    index.record(("client", 1), "first prompt", {"n": 1})
+    index.record(("client", 1), "second prompt", {"n": 2})
+    index.lookup(("client", 1), "first prompt")
+    index.record(("client", 2), "third prompt", {"n": 3})
+    assert index.lookup(("client", 1), "second prompt") is None
+    assert index.lookup(("client", 1), "first prompt") == {"n": 1}
+
+    assert index.invalidate(lambda context: context == ("client", 1)) == 1
+    assert index.lookup(("client", 1), "first prompt") is None
+    assert index.lookup(("client", 2), "third prompt") == {"n": 3}
+
+
+@pytest.mark.parametrize("plural, expected", [
+    ("subscribers", "subscriber"), ("companies", "company"), ("businesses", "business"),
+    ("boxes", "box"), ("news", "news"), ("status", "status"), ("analysis", "analysis"),
+])
+def test_singular(plural, expected):
+    assert singular(plural) == expected
+
+
+def test_boilerplate_is_ignored():
+    assert normalize_prompt(PREFIX + "Launch day") == ("launch", "day")
@@ -0,0 +1,43 @@
+import math
+import re
+from functools import lru_cache
+from typing import List
+
+# Approximates the pre-tokenization of OpenAI's BPE encodings: words with
+# their leading space, 1-3 digit groups, punctuation runs and newline runs.
+_PIECE_RE = re.compile(
+    r" ?[^\W\d_]+|\d{1,3}| ?[^\s\w]+|\s*\n+|\s+", re.UNICODE)
+
+# Chat format overhead: per message framing plus reply priming
+TOKENS_PER_MESSAGE = 3
+TOKENS_REPLY_PRIMING = 3
+
+
+def _piece_tokens(piece: str) -> int:
+    word = piece.strip()
+    if not word:
+        return 1
+    if word.isalpha():
+        # Common words are one token; longer ones split roughly every 5 chars
+        return 1 if len(word) <= 8 else math.ceil(len(word) / 5)
+    if word.isdigit():
+        return 1
+    # Punctuation runs: mostly one token per one or two characters
+    return math.ceil(len(word) / 2)
+
+
+@lru_cache(maxsize=256)
+def estimate_tokens(text: str) -> int:
+    """Offline estimate of the token count of a piece of text"""
+    return sum(_piece_tokens(piece) for piece in _PIECE_RE.findall(text))
+
+
+def estimate_prompt_tokens(parts: List[str], system_prompt: str) -> int:
+    """Estimate input tokens for a system + user chat request.
+
+    The user prompt is given as its parts so that the large, stable prefix
+    (brand context, instruction document) is counted once and cached.
+    """
+    return (estimate_tokens(system_prompt)
+            + sum(estimate_tokens(part) for part in parts)
+            + 2 * TOKENS_PER_MESSAGE + TOKENS_REPLY_PRIMING)
@@ -10,3 +10,35 @@ def extract_sections(full_response: str):
     suggestions = rationale_part[1].strip() if len(rationale_part) > 1 else "Not available"
     
     return content, rationale, suggestions
+
+
+def parse_content_type(prompt: str):
+    # The frontend sends "Content Type: <type>" as the first line of the prompt
+    for line in prompt.splitlines():
+        if line.lower().startswith("content type:"):
+            return line.split(":", 1)[1].strip() or None
+    return None
+
+
+def document_sections(document: str):
+    # Split an instruction document into (title, text) sections. A heading is a
+    # short line after a blank line that doesn't end like a sentence.
+    sections = []
+    title, lines = "(preamble)", []
+    previous_blank = True
+    for line in document.splitlines():
+        stripped = line.strip().lstrip("\ufeff#").strip()
+        is_heading = (
+            previous_blank and stripped and len(stripped) <= 60
+            and not stripped.endswith((".", ",", ";", ":", "!", "?"))
+        )
+        if is_heading:
+            if "".join(lines).strip():
+                sections.append((title, "\n".join(lines)))
+            title, lines = stripped, []
+        else:
+            lines.append(line)
+        previous_blank = not line.strip()
+    if "".join(lines).strip() or title != "(preamble)":
+        sections.append((title, "\n".join(lines)))
+    return sections
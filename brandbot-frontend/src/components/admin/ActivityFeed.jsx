@@ -18,10 +18,13 @@ const ActivityFeed = ({ activities = [] }) => {
             case "client_created":
                 return UserPlus;
             case "settings_changed":
+            case "client_updated":
+            case "document_uploaded":
                 return Settings;
             case "api_usage":
                 return Zap;
             case "alert":
+            case "client_deleted":
                 return AlertCircle;
             case "success":
                 return CheckCircle;
@@ -37,10 +40,13 @@ const ActivityFeed = ({ activities = [] }) => {
             case "client_created":
                 return "text-green-600 bg-green-100";
             case "settings_changed":
+            case "client_updated":
+            case "document_uploaded":
                 return "text-orange-600 bg-orange-100";
             case "api_usage":
                 return "text-purple-600 bg-purple-100";
             case "alert":
+            case "client_deleted":
                 return "text-red-600 bg-red-100";
             case "success":
                 return "text-green-600 bg-green-100";
@@ -94,8 +94,10 @@ const ContentRules = () => {
 
     const loadClients = async () => {
         try {
-            const clientsData = await apiService.getClients();
-            const transformedClients = clientsData.map(client => ({
+            const clientsData = await apiService.getClients(
+                "", "", "", 1, 1000, ["company_name", "plan_type"]
+            );
+            const transformedClients = clientsData.items.map(client => ({
                 id: client.id,
                 name: client.company_name,
                 plan: client.plan_type
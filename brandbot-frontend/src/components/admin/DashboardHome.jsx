@@ -11,67 +11,34 @@ import {
 } from "lucide-react";
 import StatsCard from "./StatsCard";
 import ActivityFeed from "./ActivityFeed";
+import apiService from "../../services/api";
 
 const DashboardHome = ({ backendStatus }) => {
     const [stats, setStats] = useState({
         totalClients: 0,
         contentGenerated: 0,
-        apiUsage: 0,
+        // No backend source for API usage yet; shown as unavailable
+        apiUsage: null,
         alerts: 0
     });
 
     const [activities, setActivities] = useState([]);
 
     useEffect(() => {
-        // Simulate loading stats from API
         const loadStats = async () => {
             try {
-                // In a real app, these would come from your backend API
-                setStats({
-                    totalClients: 24,
-                    contentGenerated: 1847,
-                    apiUsage: 68,
-                    alerts: 3
-                });
-
-                // Mock activity data
-                setActivities([
-                    {
-                        id: 1,
-                        type: "content_generated",
-                        message: "New social media post generated for Acme Corp",
-                        user: "Sarah Johnson",
-                        timestamp: new Date(Date.now() - 5 * 60 * 1000) // 5 minutes ago
-                    },
-                    {
-                        id: 2,
-                        type: "client_created",
-                        message: "New client 'TechStart Inc' added to the platform",
-                        user: "Mike Chen",
-                        timestamp: new Date(Date.now() - 15 * 60 * 1000) // 15 minutes ago
-                    },
-                    {
-                        id: 3,
-                        type: "settings_changed",
-                        message: "Brand voice updated for Global Solutions",
-                        user: "Emily Davis",
-                        timestamp: new Date(Date.now() - 30 * 60 * 1000) // 30 minutes ago
-                    },
-                    {
-                        id: 4,
-                        type: "api_usage",
-                        message: "API usage exceeded 80% of monthly limit",
-                        user: "System",
-                        timestamp: new Date(Date.now() - 45 * 60 * 1000) // 45 minutes ago
-                    },
-                    {
-                        id: 5,
-                        type: "success",
-                        message: "Backup completed successfully",
-                        user: "System",
-                        timestamp: new Date(Date.now() - 60 * 60 * 1000) // 1 hour ago
-                    }
+                const [dashboardStats, activity] = await Promise.all([
+                    apiService.getAdminStats(),
+                    apiService.getAdminActivity(5)
                 ]);
+                setStats((current) => ({
+                    ...current,
+                    totalClients: dashboardStats.total_clients,
+                    contentGenerated: dashboardStats.generations_total,
+                    // Alerts have no backend source yet
+                    alerts: 0
+                }));
+                setActivities(activity.items);
             } catch (error) {
                 console.error("Error loading dashboard data:", error);
             }
@@ -114,7 +81,7 @@ const DashboardHome = ({ backendStatus }) => {
                 />
                 <StatsCard
                     title="API Usage"
-                    value={`${stats.apiUsage}%`}
+                    value={stats.apiUsage === null ? "N/A" : `${stats.apiUsage}%`}
                     progress={stats.apiUsage}
                     icon={Zap}
                     color="blue"
@@ -10,6 +10,8 @@ const Dashboard = () => {
   const [media, setMedia] = useState(null);
   const [loading, setLoading] = useState(false);
   const [generatedContent, setGeneratedContent] = useState("");
+  // True when a prior result is offered instead of a new generation
+  const [reused, setReused] = useState(false);
   const [backendStatus, setBackendStatus] = useState("checking");
   const [selectedClientId, setSelectedClientId] = useState(null);
   const [availableClients, setAvailableClients] = useState([]);
@@ -51,7 +53,9 @@ const Dashboard = () => {
     }
   };
 
-  const handleGenerate = async () => {
+  // reuseSimilar: accept a recent result for an equivalent prompt; the
+  // user can still ask for a new generation
+  const handleGenerate = async (reuseSimilar = true) => {
     // Validate required fields
     if (!contentGoal) {
       alert("Please fill in the Content Goal field.");
@@ -133,10 +137,12 @@ const Dashboard = () => {
       const data = await apiService.generateContent(
         prompt,
         selectedClientId ? null : BUSINESS_ID,
-        selectedClientId
+        selectedClientId,
+        reuseSimilar
       );
 
       setGeneratedContent(data.generated_content || "No content generated.");
+      setReused(Boolean(data.reused));
 
       // Save prompt to history
       const promptText = contentGoal.trim();
@@ -156,6 +162,7 @@ const Dashboard = () => {
       }
     } catch (err) {
       console.error("Error generating content:", err);
+      setReused(false);
       setGeneratedContent(
         `Error generating content: ${err.message}. Please check if the backend server is running.`
       );
@@ -271,7 +278,7 @@ const Dashboard = () => {
                 ? "bg-violet-100 text-violet-950 hover:bg-violet-200"
                 : "bg-gray-400 text-gray-600 cursor-not-allowed"
                 }`}
-              onClick={handleGenerate}
+              onClick={() => handleGenerate()}
               disabled={loading || backendStatus !== "connected" || !selectedClientId}
             >
               {loading
@@ -284,6 +291,20 @@ const Dashboard = () => {
               <label className="block text-white text-lg font-medium mb-2 text-left">
                 Generated Content
               </label>
+              {reused && (
+                <div className="flex items-center justify-between bg-violet-800 text-violet-100 rounded-xl px-4 py-3 mb-2">
+                  <span>
+                    Showing a recent result for the same request.
+                  </span>
+                  <button
+                    className="ml-4 px-4 py-2 rounded-lg bg-violet-100 text-violet-950 font-semibold hover:bg-violet-200"
+                    onClick={() => handleGenerate(false)}
+                    disabled={loading}
+                  >
+                    Generate new
+                  </button>
+                </div>
+              )}
               <div className="bg-white rounded-xl p-4 min-h-[400px] text-violet-950 text-lg">
                 {generatedContent}
               </div>
@@ -3,6 +3,10 @@ const API_BASE_URL = (
   import.meta?.env?.VITE_API_URL || "http://localhost:8000"
 ).replace(/\/$/, "");
 
+// Deadline the backend enforces on generation requests; past it the upstream
+// call is cancelled rather than finishing for a user who has given up
+const GENERATION_TIMEOUT_SECONDS = 90;
+
 class ApiService {
   constructor() {
     this.baseURL = API_BASE_URL;
@@ -11,11 +15,11 @@ class ApiService {
   async request(endpoint, options = {}) {
     const url = `${this.baseURL}${endpoint}`;
     const config = {
+      ...options,
       headers: {
         "Content-Type": "application/json",
         ...options.headers,
       },
-      ...options,
     };
 
     try {
@@ -46,7 +50,8 @@ class ApiService {
     planType = "",
     status = "",
     page = 1,
-    pageSize = 10
+    pageSize = 10,
+    fields = []
   ) {
     const params = new URLSearchParams();
     if (search) params.append("search", search);
@@ -54,6 +59,8 @@ class ApiService {
     if (status) params.append("status", status);
     if (page) params.append("page", page);
     if (pageSize) params.append("page_size", pageSize);
+    // Only ask for the columns the caller renders ("id" is always returned)
+    if (fields.length) params.append("fields", fields.join(","));
 
     const queryString = params.toString();
     const endpoint = queryString
@@ -122,8 +129,20 @@ class ApiService {
     return this.request(`/admin/clients/${clientId}/document`);
   }
 
-  async getAllClientsForSelection() {
-    return this.request("/clients");
+  async getAllClientsForSelection(fields = []) {
+    const endpoint = fields.length
+      ? `/clients?fields=${encodeURIComponent(fields.join(","))}`
+      : "/clients";
+    return this.request(endpoint);
+  }
+
+  // Dashboard APIs
+  async getAdminStats() {
+    return this.request("/admin/stats");
+  }
+
+  async getAdminActivity(limit = 20) {
+    return this.request(`/admin/activity?limit=${limit}`);
   }
 
   // Content Rules APIs
@@ -148,16 +167,20 @@ class ApiService {
   async previewContent(previewRequest) {
     return this.request("/admin/content-preview", {
       method: "POST",
+      headers: { "X-Request-Timeout": String(GENERATION_TIMEOUT_SECONDS) },
       body: JSON.stringify(previewRequest),
     });
   }
 
   // Content Generation APIs
-  async generateContent(prompt, businessId, clientId = null) {
+  async generateContent(prompt, businessId, clientId = null, reuseSimilar = false) {
     const body = {
       prompt,
     };
 
+    // Opt in to getting a prior result back for an equivalent prompt
+    if (reuseSimilar) body.reuse_similar = true;
+
     if (clientId) {
       body.client_id = clientId;
     } else if (businessId) {
@@ -166,6 +189,7 @@ class ApiService {
 
     return this.request("/generate", {
       method: "POST",
+      headers: { "X-Request-Timeout": String(GENERATION_TIMEOUT_SECONDS) },
       body: JSON.stringify(body),
     });
   }